@@ -0,0 +1,63 @@
+"""
+This module contains the fixtures shared by the test modules.
+
+The application is imported here once, so the test modules get it through the app_instance fixture.
+"""
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from src.main import app
+from src.models import User
+from src.security import Authentication
+from testdata import TEST_PASSWORD
+
+
+@pytest.fixture(scope='session')
+def app_instance():
+    """
+    Fixture for the application, with its OpenAPI schema built once before the first request of the session.
+
+    Returns:
+        FastAPI: The application under test.
+    """
+    app.openapi()
+    return app
+
+
+@pytest_asyncio.fixture(scope='session', loop_scope='session')
+async def client(app_instance):
+    """
+    Fixture for creating an HTTP client that calls the application in-process through its ASGI interface.
+
+    Args:
+        app_instance (FastAPI): The application under test.
+
+    Yields:
+        AsyncClient: An AsyncClient instance bound to the application.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app_instance), base_url='http://test') as async_client:
+        yield async_client
+
+
+@pytest.fixture(scope='session')
+def test_user():
+    """
+    Fixture for creating a test user.
+
+    Returns:
+        User: A User instance with a username and hashed password.
+    """
+    return User(username='test', hash_password=TEST_PASSWORD)
+
+
+@pytest.fixture(scope='session')
+def hashed_password():
+    """
+    Fixture for a bcrypt hash of 'password', computed once for the whole test session.
+
+    Returns:
+        str: The hashed password.
+    """
+    return Authentication().get_password_hash('password')
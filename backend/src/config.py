@@ -4,12 +4,9 @@ This module contains the Settings class which is used to manage the settings for
 It uses the BaseSettings class from pydantic_settings and SettingsConfigDict for environment variable configuration.
 """
 
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from functools import lru_cache
 
-THIRTY = 30
-SIXTY = 60
-SEVEN = 7
-FIVE = 1
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -22,9 +19,11 @@ class Settings(BaseSettings):
 
     CMC_API_KEY: str
     DATABASE_URL: str = 'sqlite:///./test.db'
-    DB_UPDATE_INTERVAL_MINUTES: int = FIVE
+    DB_POOL_SIZE: int = 20
+    DB_POOL_MAX_OVERFLOW: int = 30
+    DB_UPDATE_INTERVAL_MINUTES: int = 5
     TOKEN_SECRET: str
-    TOKEN_EXPIRE_MINUTES: int = THIRTY * SIXTY * SEVEN
+    TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
     ALGORITHM: str = 'HS256'
     BASE_API_URL: str = 'https://pro-api.coinmarketcap.com'
     API_AUTHORIZATION_HEADER: str = 'X-CMC_PRO_API_KEY'
@@ -32,4 +31,12 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file='.env')
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Get the application settings, reading them from the environment on the first call.
+
+    Returns:
+        Settings: the application settings
+    """
+    return Settings()
@@ -1,17 +1,24 @@
 """This module provides the Database class which encapsulates all the database operations."""
 
-from datetime import datetime
+import logging
+from datetime import datetime, timezone
+from functools import lru_cache
 
-from dateutil.parser import parse
-from sqlalchemy import create_engine
+from sqlalchemy import and_, insert, select
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import session, sessionmaker
+from sqlalchemy.orm import joinedload, raiseload, session, sessionmaker
 from uuid import UUID
 
-from src.config import settings
-from src.http_client import cmc_client
+from src.config import get_settings
+from src.engine import create_db_engine
+from src.http_client import get_cmc_client
 from src.models import (Asset, AssetAmountPriceHistory, Base, Currency,
                         PriceHistory, User)
+from src.queries import (CURRENCY_BY_NAME, LATEST_PRICE_BY_CURRENCY,
+                         USER_BY_USERNAME, insert_new_price_histories,
+                         latest_timestamps)
+
+logger = logging.getLogger(__name__)
 
 
 class Database:
@@ -19,8 +26,8 @@ class Database:
 
     def __init__(self) -> None:
         """Initialize the Database class with an engine and a session factory."""
-        self.engine = create_engine(settings.DATABASE_URL)
-        self.session_factory = sessionmaker(self.engine)
+        self.engine = create_db_engine(get_settings().DATABASE_URL)
+        self.session_factory = sessionmaker(self.engine, expire_on_commit=False)
 
     def create_db(self) -> None:
         """Create database tables from models."""
@@ -37,29 +44,28 @@ class Database:
 
     async def update_price_histories(self) -> None:
         """Asynchronously update price histories in the database from CoinMarketCap API."""
-        self.create_db()
-        print('Updating price histories...')
+        logger.debug('Updating price histories...')
         try:
             with self.get_session() as db_session:
                 with db_session.begin():
-                    for row in await cmc_client.get_listings():
-                        currency = db_session.query(Currency).filter_by(
-                            name=row['name']).first()
-                        if not currency:
-                            currency = Currency(
-                                name=row['name'], symbol=row['symbol'])
-                            db_session.add(currency)
-                            db_session.flush()
-                        history = PriceHistory(
-                            currency_id=currency.id,
-                            price=row['quote']['USD']['price'],
-                            timestamp=parse(row['timestamp']),
-                        )
-                        db_session.add(history)
-                    db_session.flush()
-                    print('Price histories updated successfully')
+                    timestamp, rows = await get_cmc_client().get_listings()
+                    currencies = self._get_or_create_currencies(db_session, rows)
+                    latest_prices = self._get_latest_prices(db_session)
+                    sync_timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+                    histories = [
+                        {
+                            'currency_id': currencies[row['name']].id,
+                            'price': row['quote']['USD']['price'],
+                            'timestamp': sync_timestamp,
+                        }
+                        for row in rows
+                        if latest_prices.get(currencies[row['name']].id) != row['quote']['USD']['price']
+                    ]
+                    if histories:
+                        db_session.execute(insert_new_price_histories(self.engine.dialect.name), histories)
+                    logger.debug('Price histories updated successfully')
         except (SQLAlchemyError, Exception) as error:
-            print(f'Error occurred: {error}')
+            logger.error(f'Error occurred: {error}')
 
     def get_listings_from_db(self) -> list[dict]:
         """
@@ -69,16 +75,68 @@ class Database:
             list[dict]: List of cryptocurrencies(dict)\
                   (keys: name, symbol, price, sync_timestamp )
         """
+        latest = latest_timestamps(PriceHistory.currency_id, PriceHistory.timestamp)
+        query = (
+            select(Currency.name, Currency.symbol, PriceHistory.price, PriceHistory.timestamp)
+            .join(latest, latest.c.key_id == Currency.id)
+            .join(PriceHistory, and_(
+                PriceHistory.currency_id == latest.c.key_id,
+                PriceHistory.timestamp == latest.c.timestamp,
+            ))
+        )
         with self.get_session() as db_session:
-            currencies = db_session.query(Currency).all()
-            crypto_listings = []
-            for currency in currencies:
-                if currency.price_histories:
-                    price = max(currency.price_histories,
-                                key=lambda ph: ph.timestamp)
-                    crypto_listings.append({'name': currency.name, 'symbol': currency.symbol,
-                                            'price': price.price, 'sync_timestamp': price.timestamp})
-            return crypto_listings
+            return [
+                {'name': row.name, 'symbol': row.symbol, 'price': row.price, 'sync_timestamp': row.timestamp}
+                for row in db_session.execute(query)
+            ]
+
+    def _get_or_create_currencies(self, db_session: session.Session, rows: list[dict]) -> dict[str, Currency]:
+        """
+        Load the currencies of the listing rows with one query and create the missing ones.
+
+        Args:
+            db_session (session.Session): session of the running transaction
+            rows (list[dict]): listing rows from CoinMarketCap API
+
+        Returns:
+            dict[str, Currency]: Currency objects by name
+        """
+        names = {row['name']: row['symbol'] for row in rows}
+        currencies = {
+            currency.name: currency
+            for currency in db_session.scalars(
+                select(Currency).where(Currency.name.in_(names)).options(raiseload('*')),
+            )
+        }
+        new_currencies = {
+            name: Currency(name=name, symbol=symbol)
+            for name, symbol in names.items()
+            if name not in currencies
+        }
+        if new_currencies:
+            db_session.add_all(new_currencies.values())
+            db_session.flush()
+            currencies.update(new_currencies)
+        return currencies
+
+    def _get_latest_prices(self, db_session: session.Session) -> dict[UUID, float]:
+        """
+        Get the latest stored price of every currency.
+
+        Args:
+            db_session (session.Session): session of the running transaction
+
+        Returns:
+            dict[UUID, float]: latest prices by currency ID
+        """
+        latest = latest_timestamps(PriceHistory.currency_id, PriceHistory.timestamp)
+        return dict(db_session.execute(
+            select(PriceHistory.currency_id, PriceHistory.price)
+            .join(latest, and_(
+                PriceHistory.currency_id == latest.c.key_id,
+                PriceHistory.timestamp == latest.c.timestamp,
+            )),
+        ).all())
 
 
 class UserOperations:
@@ -104,7 +162,7 @@ class UserOperations:
             User | None: User object if found else None
         """
         with self.db.get_session() as db_session:
-            return db_session.query(User).filter_by(username=username).first()
+            return db_session.execute(USER_BY_USERNAME, {'username': username}).scalar_one_or_none()
 
     def create_user(self, username: str, hashed_password: str) -> User:
         """
@@ -152,18 +210,35 @@ class UserOperations:
         """
         try:
             with self.db.get_session() as db_session:
+                assets = db_session.scalars(
+                    select(Asset)
+                    .where(Asset.user_id == user.id)
+                    .options(joinedload(Asset.currency), raiseload('*')),
+                ).all()
+                latest = latest_timestamps(AssetAmountPriceHistory.asset_id, AssetAmountPriceHistory.timestamp)
+                latest_by_asset = {
+                    history.asset_id: history
+                    for history in db_session.scalars(
+                        select(AssetAmountPriceHistory)
+                        .join(latest, and_(
+                            AssetAmountPriceHistory.asset_id == latest.c.key_id,
+                            AssetAmountPriceHistory.timestamp == latest.c.timestamp,
+                        ))
+                        .where(AssetAmountPriceHistory.asset_id.in_([asset.id for asset in assets]))
+                        .options(raiseload('*')),
+                    )
+                }
                 asset_info_list = []
-                for asset in db_session.query(Asset).filter_by(user_id=user.id).all():
-                    print(asset.amount_price_histories)
-                    asset_amount = max(asset.amount_price_histories, key=lambda _: _.timestamp).amount
-                    asset_price = max(asset.amount_price_histories, key=lambda _: _.timestamp).price
-                    asset_info = {
+                for asset in assets:
+                    history = latest_by_asset.get(asset.id)
+                    if history is None:
+                        continue
+                    asset_info_list.append({
                         'currency': asset.currency.name,
-                        'amount': asset_amount,
-                        'current cost': asset_amount * asset_price,
-                        'current_price': asset_price,
-                    }
-                    asset_info_list.append(asset_info)
+                        'amount': history.amount,
+                        'current cost': history.amount * history.price,
+                        'current_price': history.price,
+                    })
                 return asset_info_list
         except SQLAlchemyError as error:
             raise Exception(f'Database error: {error}')
@@ -186,11 +261,6 @@ class UserOperations:
             with db_session.begin():
                 asset = Asset(user_id=user.id, currency_id=currency.id)
                 db_session.add(asset)
-                db_session.flush()
-                asset_id = asset.id
-        # Get the asset from the database in the session where it will be used
-        with self.db.get_session() as db_session2:
-            asset = db_session2.query(Asset).filter_by(id=asset_id).first()
         return asset
 
 
@@ -217,7 +287,7 @@ class CurrencyOperation:
             Currency | None: Currency object from db if found else None
         """
         with self.db.get_session() as db_session:
-            return db_session.query(Currency).filter_by(name=name).first()
+            return db_session.execute(CURRENCY_BY_NAME, {'name': name}).scalars().first()
 
     def get_latest_price_by_currency_from_db(self, currency: Currency) -> PriceHistory | None:
         """
@@ -230,12 +300,9 @@ class CurrencyOperation:
             PriceHistory | None: PriceHistory object if found else None
         """
         with self.db.get_session() as db_session:
-            return (
-                db_session.query(PriceHistory)
-                .filter_by(currency_id=currency.id)
-                .order_by(PriceHistory.timestamp.desc())
-                .first()
-            )
+            return db_session.execute(
+                LATEST_PRICE_BY_CURRENCY, {'currency_id': currency.id},
+            ).scalar_one_or_none()
 
 
 class AssetOperation:
@@ -262,7 +329,9 @@ class AssetOperation:
             Asset | None: Asset object if found else None
         """
         with self.db.get_session() as db_session:
-            return db_session.query(Asset).filter_by(user_id=user.id, currency_id=currency.id).first()
+            return db_session.scalar(
+                select(Asset).where(Asset.user_id == user.id, Asset.currency_id == currency.id),
+            )
 
     def add_asset_amount(self, asset_id: UUID, amount: float) -> AssetAmountPriceHistory:
         """
@@ -276,20 +345,59 @@ class AssetOperation:
             AssetAmountPriceHistory: The AssetAmountPriceHistory object that was added.
 
         Raises:
-            ValueError: If no asset is found with the provided ID.
+            ValueError: If no asset is found with the provided ID or its currency has no price.
         """
         with self.db.get_session() as db_session:
             with db_session.begin():
-                fresh_asset = db_session.query(Asset).filter_by(id=asset_id).first()
-                if fresh_asset is None:
+                row = db_session.execute(
+                    select(Asset.id, PriceHistory.price)
+                    .outerjoin(PriceHistory, PriceHistory.currency_id == Asset.currency_id)
+                    .where(Asset.id == asset_id)
+                    .order_by(PriceHistory.timestamp.desc())
+                    .limit(1),
+                ).first()
+                if row is None:
                     raise ValueError(f'No asset found with ID {asset_id}')
-                price = CurrencyOperation(self.db).get_latest_price_by_currency_from_db(fresh_asset.currency).price
+                if row.price is None:
+                    raise ValueError(f'No price found for the currency of asset {asset_id}')
                 asset_amount = AssetAmountPriceHistory(
-                    asset_id=fresh_asset.id, amount=amount, timestamp=datetime.utcnow(), price=price)
+                    asset_id=row.id, amount=amount, timestamp=datetime.now(timezone.utc), price=row.price)
                 db_session.add(asset_amount)
                 db_session.flush()
                 return asset_amount
 
+    def add_asset_amounts(self, asset_amounts: list[tuple[UUID, float]]) -> None:
+        """
+        Add amounts to several assets at once.
+
+        Args:
+            asset_amounts (list[tuple[UUID, float]]): pairs of asset ID and amount to add, one per asset
+
+        Raises:
+            ValueError: If an asset is not found or its currency has no price.
+        """
+        asset_ids = [asset_id for asset_id, _ in asset_amounts]
+        latest = latest_timestamps(PriceHistory.currency_id, PriceHistory.timestamp)
+        with self.db.get_session() as db_session:
+            with db_session.begin():
+                prices = dict(db_session.execute(
+                    select(Asset.id, PriceHistory.price)
+                    .join(latest, latest.c.key_id == Asset.currency_id)
+                    .join(PriceHistory, and_(
+                        PriceHistory.currency_id == latest.c.key_id,
+                        PriceHistory.timestamp == latest.c.timestamp,
+                    ))
+                    .where(Asset.id.in_(asset_ids)),
+                ).all())
+                missing_ids = set(asset_ids) - prices.keys()
+                if missing_ids:
+                    raise ValueError(f'No asset or price found for asset IDs {missing_ids}')
+                timestamp = datetime.now(timezone.utc)
+                db_session.execute(insert(AssetAmountPriceHistory), [
+                    {'asset_id': asset_id, 'amount': amount, 'timestamp': timestamp, 'price': prices[asset_id]}
+                    for asset_id, amount in asset_amounts
+                ])
+
     def get_last_asset_amount(self, asset: Asset) -> AssetAmountPriceHistory | None:
         """
         Get the last amount of the asset.
@@ -301,15 +409,53 @@ class AssetOperation:
             AssetAmountPriceHistory | None: AssetAmountPriceHistory object if found else None
         """
         with self.db.get_session() as db_session:
-            return (
-                db_session.query(AssetAmountPriceHistory)
-                .filter_by(asset_id=asset.id)
+            return db_session.scalar(
+                select(AssetAmountPriceHistory)
+                .where(AssetAmountPriceHistory.asset_id == asset.id)
                 .order_by(AssetAmountPriceHistory.timestamp.desc())
-                .first()
+                .limit(1),
             )
 
 
-DB = Database()
-user_operations = UserOperations(DB)
-currency_operations = CurrencyOperation(DB)
-asset_operation = AssetOperation(DB)
+@lru_cache(maxsize=1)
+def get_db() -> Database:
+    """
+    Get the application database, creating its engine on the first call.
+
+    Returns:
+        Database: the application database
+    """
+    return Database()
+
+
+@lru_cache(maxsize=1)
+def get_user_operations() -> UserOperations:
+    """
+    Get the user operations bound to the application database.
+
+    Returns:
+        UserOperations: the user operations
+    """
+    return UserOperations(get_db())
+
+
+@lru_cache(maxsize=1)
+def get_currency_operations() -> CurrencyOperation:
+    """
+    Get the currency operations bound to the application database.
+
+    Returns:
+        CurrencyOperation: the currency operations
+    """
+    return CurrencyOperation(get_db())
+
+
+@lru_cache(maxsize=1)
+def get_asset_operations() -> AssetOperation:
+    """
+    Get the asset operations bound to the application database.
+
+    Returns:
+        AssetOperation: the asset operations
+    """
+    return AssetOperation(get_db())
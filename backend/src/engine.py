@@ -0,0 +1,71 @@
+"""This module provides the create_db_engine function which builds the SQLAlchemy engine of the application."""
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.engine.interfaces import DBAPIConnection
+from sqlalchemy.pool import ConnectionPoolEntry, StaticPool
+
+from src.config import get_settings
+
+POOL_RECYCLE_SECONDS = 1800
+SQLITE_MMAP_SIZE = 268435456
+
+
+def create_db_engine(database_url: str) -> Engine:
+    """
+    Create an engine with connection settings suited to the database.
+
+    Args:
+        database_url (str): URL of the database
+
+    Returns:
+        Engine: SQLAlchemy engine
+    """
+    url = make_url(database_url)
+    engine = create_engine(url, **_get_engine_options(url))
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _set_sqlite_pragmas)
+    return engine
+
+
+def _get_engine_options(database_url: URL) -> dict:
+    """
+    Get the connection pool options for the database.
+
+    The pool of a server database is sized by the DB_POOL_SIZE and DB_POOL_MAX_OVERFLOW settings.
+
+    Args:
+        database_url (URL): URL of the database
+
+    Returns:
+        dict: keyword arguments for create_engine
+    """
+    if database_url.get_backend_name() != 'sqlite':
+        settings = get_settings()
+        return {
+            'pool_size': settings.DB_POOL_SIZE,
+            'max_overflow': settings.DB_POOL_MAX_OVERFLOW,
+            'pool_pre_ping': True,
+            'pool_use_lifo': True,
+            'pool_recycle': POOL_RECYCLE_SECONDS,
+        }
+    engine_options = {'connect_args': {'check_same_thread': False}}
+    if database_url.database in {None, '', ':memory:'}:
+        engine_options['poolclass'] = StaticPool
+    return engine_options
+
+
+def _set_sqlite_pragmas(dbapi_connection: DBAPIConnection, _: ConnectionPoolEntry) -> None:
+    """
+    Switch a new SQLite connection to WAL journaling without fsync on every commit.
+
+    Args:
+        dbapi_connection (DBAPIConnection): new SQLite connection
+        _ (ConnectionPoolEntry): pool entry of the connection
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+    cursor.close()
@@ -1,10 +1,20 @@
 """This module contains the CMCHTTPClient class which is used to interact with the CoinMarketCap API."""
 
-import json
+import asyncio
+import time
+from functools import lru_cache
+from typing import Optional
 
-from aiohttp import ClientResponseError, ClientSession
+import orjson
+from aiohttp import ClientResponseError, ClientSession, TCPConnector
+from multidict import CIMultiDict
 
-from src.config import settings
+from src.config import get_settings
+
+CONNECTION_LIMIT = 32
+DNS_CACHE_TTL_SECONDS = 300
+KEEPALIVE_TIMEOUT_SECONDS = 75
+LISTINGS_CACHE_TTL_SECONDS = 30
 
 
 class CMCHTTPClient:
@@ -15,29 +25,42 @@ class CMCHTTPClient:
         _session (ClientSession): aiohttp client session.
     """
 
-    def __init__(self, base_url: str, api_key: str):
+    def __init__(self, base_url: str, api_key: str, connector: Optional[TCPConnector] = None):
         """
         Initialize the CMCHTTPClient.
 
         Args:
             base_url (str): The base URL for the API.
             api_key (str): The API key for authentication.
+            connector (TCPConnector, optional): Connector of the session, closed by the caller. Defaults to own pool.
         """
         self._session = None
         self._base_url = base_url
-        self._api_key = api_key
+        self._headers = CIMultiDict({get_settings().API_AUTHORIZATION_HEADER: api_key})
+        self._connector = connector
+        self._cached_listings = None
 
     async def start(self) -> None:
         """
         Start the client session with the provided base URL and API key.
 
-        The session will include the API key in the headers for authentication.
+        The session will include the API key in the headers for authentication and sends no User-Agent header.
+        It is kept open between requests to reuse pooled keep-alive connections,
+        so calling this method on a started client does nothing.
         """
+        if self._session is not None:
+            return
         self._session = ClientSession(
-            headers={
-                settings.API_AUTHORIZATION_HEADER: self._api_key,
-            },
+            headers=self._headers,
+            skip_auto_headers=('User-Agent',),
             base_url=self._base_url,
+            connector=self._connector or TCPConnector(
+                limit=CONNECTION_LIMIT,
+                ttl_dns_cache=DNS_CACHE_TTL_SECONDS,
+                keepalive_timeout=KEEPALIVE_TIMEOUT_SECONDS,
+                enable_cleanup_closed=True,
+            ),
+            connector_owner=self._connector is None,
         )
 
     async def stop(self) -> None:
@@ -46,15 +69,65 @@ class CMCHTTPClient:
 
         If the session is not started, this method does nothing.
         """
+        self._cached_listings = None
         if self._session:
             await self._session.close()
+            self._session = None
 
-    async def get_listings(self) -> list[dict]:
+    async def get_listings(self) -> tuple[str, list[dict]]:
         """
         Get list of cryptocurrencies from CoinMarketCap API.
 
+        A response is reused for LISTINGS_CACHE_TTL_SECONDS and concurrent callers wait for the same request.
+        Failed requests are not reused.
+
+        Returns:
+            tuple[str, list[dict]]: Timestamp of the listings and list of cryptocurrencies(dict).
+
+        Raises:
+            Exception: If any error occurred.
+        """
+        now = time.monotonic()
+        if self._cached_listings is None or self._cached_listings[0] <= now:
+            self._cached_listings = (now + LISTINGS_CACHE_TTL_SECONDS, asyncio.ensure_future(self._fetch_listings()))
+        listings_task = self._cached_listings[1]
+        try:
+            return await asyncio.shield(listings_task)
+        except Exception:
+            if self._cached_listings is not None and self._cached_listings[1] is listings_task:
+                self._cached_listings = None
+            raise
+
+    async def get_currencies(self, currency_ids: list[int]) -> dict[int, dict]:
+        """
+        Get the latest quotes of several cryptocurrencies from CoinMarketCap API in one request.
+
+        Args:
+            currency_ids (list[int]): CoinMarketCap ids of the cryptocurrencies.
+
         Returns:
-            list[dict]: List of cryptocurrencies(dict).
+            dict[int, dict]: Quotes of the cryptocurrencies by their ids.
+
+        Raises:
+            Exception: If any error occurred.
+        """
+        if not currency_ids:
+            return {}
+        await self.start()
+        query = {'id': ','.join(map(str, currency_ids))}
+        try:
+            async with self._session.get('/v2/cryptocurrency/quotes/latest', params=query) as response:
+                currencies = orjson.loads(await response.read())['data']
+        except (ClientResponseError, orjson.JSONDecodeError) as error:
+            raise Exception(f'Error occurred: {error}')
+        return {int(currency_id): currency for currency_id, currency in currencies.items()}
+
+    async def _fetch_listings(self) -> tuple[str, list[dict]]:
+        """
+        Request the list of cryptocurrencies from CoinMarketCap API.
+
+        Returns:
+            tuple[str, list[dict]]: Timestamp of the listings and list of cryptocurrencies(dict).
 
         Raises:
             Exception: If any error occurred.
@@ -62,17 +135,22 @@ class CMCHTTPClient:
         await self.start()
         try:
             async with self._session.get('/v1/cryptocurrency/listings/latest') as response:
-                response_json = await response.json()
-                timestamp = response_json['status']['timestamp']
-                return [{**row, 'timestamp': timestamp} for row in response_json['data']]
-        except (ClientResponseError, json.JSONDecodeError) as error:
+                response_json = orjson.loads(await response.read())
+                return response_json['status']['timestamp'], response_json['data']
+        except (ClientResponseError, orjson.JSONDecodeError) as error:
             raise Exception(f'Error occurred: {error}')
-        finally:
-            await self.stop()
 
 
-# Initialize the CoinMarketCap HTTP client
-cmc_client = CMCHTTPClient(
-    base_url=settings.BASE_API_URL,
-    api_key=settings.CMC_API_KEY,
-)
+@lru_cache(maxsize=1)
+def get_cmc_client() -> CMCHTTPClient:
+    """
+    Get the CoinMarketCap HTTP client, creating it on the first call.
+
+    Returns:
+        CMCHTTPClient: the CoinMarketCap HTTP client
+    """
+    settings = get_settings()
+    return CMCHTTPClient(
+        base_url=settings.BASE_API_URL,
+        api_key=settings.CMC_API_KEY,
+    )
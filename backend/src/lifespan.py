@@ -0,0 +1,47 @@
+"""This module contains the lifespan of the application and its scheduled price update job."""
+
+from contextlib import asynccontextmanager
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+
+from src.config import get_settings
+from src.db import get_db
+from src.http_client import get_cmc_client
+from src.listings import get_listings_cache
+
+UPDATE_MISFIRE_GRACE_SECONDS = 30
+
+
+async def update_prices() -> None:
+    """Update the price histories from CoinMarketCap API, then refresh the listings cache."""
+    await get_db().update_price_histories()
+    await run_in_threadpool(get_listings_cache().refresh)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Create the database tables, then run the CoinMarketCap client session and the price update job.
+
+    Yields:
+        None: control to the running application.
+    """
+    db = get_db()
+    db.create_db()
+    await run_in_threadpool(get_listings_cache().refresh)
+    cmc_client = get_cmc_client()
+    await cmc_client.start()
+    scheduler = AsyncIOScheduler()
+    scheduler.add_job(
+        update_prices,
+        'interval',
+        minutes=get_settings().DB_UPDATE_INTERVAL_MINUTES,
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=UPDATE_MISFIRE_GRACE_SECONDS,
+    )
+    scheduler.start()
+    yield
+    scheduler.shutdown()
+    await cmc_client.stop()
@@ -0,0 +1,81 @@
+"""This module contains the ListingsCache class which keeps the latest cryptocurrency listings in memory."""
+
+import hashlib
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import orjson
+
+from src.db import get_db
+
+
+class ListingsSnapshot(NamedTuple):
+    """Listings loaded by one refresh, keyed by ID, together with their JSON body and ETag."""
+
+    listings_by_id: dict[int, dict]
+    listings_json: bytes
+    etag: str
+
+
+class ListingsCache:
+    """Snapshot of the cryptocurrency listings, refreshed after every price update."""
+
+    def __init__(self) -> None:
+        """Initialize the ListingsCache with an empty snapshot."""
+        self._snapshot = ListingsSnapshot(listings_by_id={}, listings_json=b'[]', etag='""')
+
+    def refresh(self) -> None:
+        """
+        Load the listings from the database and replace the snapshot with them.
+
+        The listings are serialized to JSON here once, so the listings endpoint does not serialize them per request.
+        The ETag is a hash of that JSON, so it is the same in every worker and only changes with the listings.
+        """
+        listings = get_db().get_listings_from_db()
+        listings_json = orjson.dumps(listings)
+        self._snapshot = ListingsSnapshot(
+            listings_by_id=dict(enumerate(listings, start=1)),
+            listings_json=listings_json,
+            etag=f'"{hashlib.blake2b(listings_json, digest_size=8).hexdigest()}"',
+        )
+
+    def get_etag(self) -> str:
+        """
+        Get the ETag of the snapshot, which changes when a refresh loads different listings.
+
+        Returns:
+            str: quoted entity tag
+        """
+        return self._snapshot.etag
+
+    def get_listings_json(self) -> bytes:
+        """
+        Get the listings of the snapshot serialized to JSON.
+
+        Returns:
+            bytes: JSON array of the listings
+        """
+        return self._snapshot.listings_json
+
+    def get_listing(self, currency_id: int) -> Optional[dict]:
+        """
+        Get a listing of the snapshot by its ID.
+
+        Args:
+            currency_id (int): position of the cryptocurrency in the listings, starting from 1
+
+        Returns:
+            Optional[dict]: the cryptocurrency or None if there is no cryptocurrency with the ID
+        """
+        return self._snapshot.listings_by_id.get(currency_id)
+
+
+@lru_cache(maxsize=1)
+def get_listings_cache() -> ListingsCache:
+    """
+    Get the ListingsCache instance, creating it on the first call.
+
+    Returns:
+        ListingsCache: the listings cache
+    """
+    return ListingsCache()
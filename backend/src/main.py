@@ -1,16 +1,18 @@
 """This module contains the main application and its routes."""
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from fastapi import FastAPI, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
-from src.config import settings
-from src.db import DB, user_operations
+from src.db import get_user_operations
+from src.lifespan import lifespan
 from src.router import router, user_routes
 from src.schemas import UserCreateOrLogin
-from src.secutiry import auth
+from src.security import get_auth
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 origins = [
     'http://10.82.104.247:5173',
@@ -28,14 +30,6 @@ app.add_middleware(
 app.include_router(router)
 app.include_router(user_routes)
 
-scheduler = AsyncIOScheduler()
-scheduler.start()
-scheduler.add_job(
-    DB.update_price_histories,
-    'interval',
-    minutes=settings.DB_UPDATE_INTERVAL_MINUTES,
-)
-
 
 @app.get('/')
 def read_item():
@@ -61,14 +55,14 @@ async def login_for_access_token(form_data: UserCreateOrLogin):
         HTTPException: If authentication fails.
     """
     try:
-        user = await auth.authenticate_user(form_data.username, form_data.password)
+        user = await get_auth().authenticate_user(form_data.username, form_data.password)
     except Exception as error:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(error),
         )
     return {
-        'token': auth.generate_jwt_token(username=user.username),
+        'token': get_auth().generate_jwt_token(username=user.username),
         'token_type': 'bearer',
     }
 
@@ -86,14 +80,16 @@ async def register(form_data: UserCreateOrLogin):
     Raises:
         HTTPException: If the username is already taken.
     """
-    user = user_operations.get_user_by_username_from_db(form_data.username)
+    user_operations = get_user_operations()
+    user = await run_in_threadpool(user_operations.get_user_by_username_from_db, form_data.username)
     if user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail='User already exists',
         )
-    user = user_operations.create_user(
+    user = await run_in_threadpool(
+        user_operations.create_user,
         username=form_data.username,
-        hashed_password=auth.get_password_hash(form_data.password),
+        hashed_password=await run_in_threadpool(get_auth().get_password_hash, form_data.password),
     )
     return Response(status_code=status.HTTP_201_CREATED, content='User created')
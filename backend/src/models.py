@@ -1,14 +1,41 @@
 """This module contains the SQLAlchemy ORM models for the application."""
 
+import os
+import time
+import uuid
 from datetime import datetime
 from typing import List
-from uuid import uuid4
 
-from sqlalchemy import (CheckConstraint, DateTime, ForeignKey, Text,
+from sqlalchemy import (CheckConstraint, DateTime, ForeignKey, Index, Text,
                         UniqueConstraint)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
+UUID_TIMESTAMP_BYTES = 6
+UUID_RANDOM_BYTES = 10
+UUID_VERSION_BYTE = 6
+UUID_VERSION_BITS = 0x70
+UUID_VARIANT_BYTE = 8
+UUID_VARIANT_RFC_BITS = 0x80
+UUID_VERSION_MASK = 0xF
+UUID_VARIANT_MASK = 0x3F
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generate a time-ordered UUID version 7 as defined by RFC 9562.
+
+    The first 48 bits are the Unix time in milliseconds, so new rows are appended to the end of the primary key index.
+
+    Returns:
+        uuid.UUID: UUID version 7
+    """
+    timestamp_ms = int(time.time() * 1000)
+    uuid_bytes = bytearray(timestamp_ms.to_bytes(UUID_TIMESTAMP_BYTES, 'big') + os.urandom(UUID_RANDOM_BYTES))
+    uuid_bytes[UUID_VERSION_BYTE] = uuid_bytes[UUID_VERSION_BYTE] & UUID_VERSION_MASK | UUID_VERSION_BITS
+    uuid_bytes[UUID_VARIANT_BYTE] = uuid_bytes[UUID_VARIANT_BYTE] & UUID_VARIANT_MASK | UUID_VARIANT_RFC_BITS
+    return uuid.UUID(bytes=bytes(uuid_bytes))
+
 
 class Base(DeclarativeBase):
     """Base class for all SQLAlchemy ORM models."""
@@ -17,7 +44,7 @@ class Base(DeclarativeBase):
 class UUIDmixin:
     """Mixin class for models that use a UUID as primary key."""
 
-    id: Mapped[UUID] = mapped_column(UUID, primary_key=True, default=uuid4)
+    id: Mapped[UUID] = mapped_column(UUID, primary_key=True, default=uuid7)
 
 
 class User(Base, UUIDmixin):
@@ -46,7 +73,7 @@ class Asset(Base, UUIDmixin):
     currency_id: Mapped[UUID] = mapped_column(
         UUID, ForeignKey('currency.id'), index=True, nullable=False)
     currency: Mapped['Currency'] = relationship(
-        'Currency', back_populates='assets')
+        'Currency', back_populates='assets', lazy='joined')
 
     user_id: Mapped[UUID] = mapped_column(
         UUID, ForeignKey('user.id'), index=True, nullable=False)
@@ -64,7 +91,7 @@ class AssetAmountPriceHistory(Base, UUIDmixin):
 
     amount: Mapped[float]
     asset_id: Mapped[UUID] = mapped_column(
-        UUID, ForeignKey('asset.id'), index=True, nullable=False)
+        UUID, ForeignKey('asset.id'), nullable=False)
     asset: Mapped['Asset'] = relationship(
         'Asset', back_populates='amount_price_histories')
     timestamp: Mapped[datetime] = mapped_column(
@@ -72,7 +99,10 @@ class AssetAmountPriceHistory(Base, UUIDmixin):
     price: Mapped[float]
 
     __table_args__ = (
-        UniqueConstraint('asset_id', 'timestamp'),
+        Index(
+            'ix_asset_price_history_asset_ts', 'asset_id', 'timestamp',
+            unique=True, postgresql_include=['price', 'amount'],
+        ),
         CheckConstraint('price >= 0'),
         CheckConstraint('amount >= 0'),
     )
@@ -103,7 +133,7 @@ class PriceHistory(Base, UUIDmixin):
     __tablename__ = 'price_history'
 
     currency_id: Mapped[UUID] = mapped_column(
-        UUID, ForeignKey('currency.id'), index=True)
+        UUID, ForeignKey('currency.id'))
     currency: Mapped['Currency'] = relationship(
         'Currency', back_populates='price_histories')
     timestamp: Mapped[datetime] = mapped_column(
@@ -111,6 +141,9 @@ class PriceHistory(Base, UUIDmixin):
     price: Mapped[float]
 
     __table_args__ = (
-        UniqueConstraint('currency_id', 'timestamp'),
+        Index(
+            'ix_price_history_currency_ts', 'currency_id', 'timestamp',
+            unique=True, postgresql_include=['price'],
+        ),
         CheckConstraint('price >= 0'),
     )
@@ -0,0 +1,51 @@
+"""This module contains the SQL statements shared by the database operations."""
+
+from sqlalchemy import (ColumnElement, Insert, Subquery, bindparam, func,
+                        insert, lambda_stmt, select)
+from sqlalchemy.dialects import postgresql, sqlite
+
+from src.models import Currency, PriceHistory, User
+
+USER_BY_USERNAME = lambda_stmt(lambda: select(User).where(User.username == bindparam('username')))
+CURRENCY_BY_NAME = lambda_stmt(lambda: select(Currency).where(Currency.name == bindparam('name')))
+LATEST_PRICE_BY_CURRENCY = lambda_stmt(
+    lambda: select(PriceHistory)
+    .where(PriceHistory.currency_id == bindparam('currency_id'))
+    .order_by(PriceHistory.timestamp.desc())
+    .limit(1),
+)
+
+
+def latest_timestamps(key: ColumnElement, timestamp: ColumnElement) -> Subquery:
+    """
+    Build a subquery with the latest timestamp for every key.
+
+    Args:
+        key (ColumnElement): column to group the rows by (key_id column of the subquery)
+        timestamp (ColumnElement): timestamp column to take the maximum of (timestamp column of the subquery)
+
+    Returns:
+        Subquery: subquery with key_id and timestamp columns
+    """
+    return (
+        select(key.label('key_id'), func.max(timestamp).label('timestamp'))
+        .group_by(key)
+        .subquery()
+    )
+
+
+def insert_new_price_histories(dialect_name: str) -> Insert:
+    """
+    Build an INSERT of price histories that skips rows already stored for the same currency and timestamp.
+
+    Args:
+        dialect_name (str): name of the database dialect
+
+    Returns:
+        Insert: INSERT statement for the dialect
+    """
+    if dialect_name == 'postgresql':
+        return postgresql.insert(PriceHistory).on_conflict_do_nothing(index_elements=['currency_id', 'timestamp'])
+    if dialect_name == 'sqlite':
+        return sqlite.insert(PriceHistory).on_conflict_do_nothing(index_elements=['currency_id', 'timestamp'])
+    return insert(PriceHistory)
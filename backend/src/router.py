@@ -1,49 +1,116 @@
 """This module defines the routes for the FastAPI application."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated, Optional
 
-from src.db import DB, asset_operation, currency_operations, user_operations
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
+
+from src.config import get_settings
+from src.db import (get_asset_operations, get_currency_operations,
+                    get_user_operations)
+from src.listings import get_listings_cache
 from src.models import User
 from src.schemas import AssetCreate, oauth2_scheme
-from src.secutiry import auth
+from src.security import get_auth
 
 HTTP_STATUS_NOT_FOUND = 404
 HTTP_STATUS_BAD_REQUEST = 400
+HTTP_STATUS_NOT_MODIFIED = 304
+USER_CACHE_SIZE = 10000
+USER_CACHE_TTL_SECONDS = 30
+
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
 
 router = APIRouter(
     prefix='/cryptocurrencies',
 )
 
 
+IfNoneMatch = Annotated[Optional[str], Header()]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag with the weak comparison.
+
+    Args:
+        if_none_match (Optional[str]): The If-None-Match header of the request.
+        etag (str): The current quoted entity tag.
+
+    Returns:
+        bool: True if the header is '*' or lists the entity tag, weak or strong.
+    """
+    if if_none_match is None:
+        return False
+    entity_tags = {entity_tag.strip().removeprefix('W/') for entity_tag in if_none_match.split(',')}
+    return '*' in entity_tags or etag in entity_tags
+
+
+def set_cache_headers(response: Response, if_none_match: Optional[str]) -> bool:
+    """
+    Set the caching headers of a listings response.
+
+    Args:
+        response (Response): The response to set the headers on.
+        if_none_match (Optional[str]): The If-None-Match header of the request.
+
+    Returns:
+        bool: True if the client already has the current listings.
+    """
+    etag = get_listings_cache().get_etag()
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = f'public, max-age={get_settings().DB_UPDATE_INTERVAL_MINUTES * 60}'
+    return etag_matches(if_none_match, etag)
+
+
 @router.get('')
-async def get_cryptocurrencies():
+async def get_cryptocurrencies(response: Response, if_none_match: IfNoneMatch = None):
     """
     Get a list of all cryptocurrencies.
 
+    Args:
+        response (Response): The response to set the caching headers on.
+        if_none_match (IfNoneMatch): The If-None-Match header of the request.
+
     Returns:
-        list: A list of all cryptocurrencies.
+        Response: JSON list of all cryptocurrencies, or an empty 304 response if the client has them already.
     """
-    return DB.get_listings_from_db()
+    if set_cache_headers(response, if_none_match):
+        return Response(status_code=HTTP_STATUS_NOT_MODIFIED, headers=response.headers)
+    return Response(
+        content=get_listings_cache().get_listings_json(),
+        media_type='application/json',
+        headers=response.headers,
+    )
 
 
 @router.get('/{currency_id}')
-async def get_cryptocurrency(currency_id: int):
+async def get_cryptocurrency(
+    currency_id: int,
+    response: Response,
+    if_none_match: IfNoneMatch = None,
+):
     """
     Get a specific cryptocurrency by its ID.
 
     Args:
         currency_id (int): The ID of the cryptocurrency.
+        response (Response): The response to set the caching headers on.
+        if_none_match (IfNoneMatch): The If-None-Match header of the request.
 
     Returns:
-        dict: The cryptocurrency with the given ID.
+        dict: The cryptocurrency with the given ID, or an empty 304 response if the client has it already.
 
     Raises:
         HTTPException: If the cryptocurrency with the given ID does not exist.
     """
-    try:
-        return DB.get_listings_from_db()[currency_id-1]
-    except IndexError:
+    listing = get_listings_cache().get_listing(currency_id)
+    if listing is None:
         raise HTTPException(status_code=HTTP_STATUS_NOT_FOUND, detail='Currency not found')
+    if set_cache_headers(response, if_none_match):
+        return Response(status_code=HTTP_STATUS_NOT_MODIFIED, headers=response.headers)
+    return listing
 
 
 user_routes = APIRouter(
@@ -51,15 +118,33 @@ user_routes = APIRouter(
 )
 
 
-oauth2_scheme_depends = Depends(oauth2_scheme)
+Token = Annotated[str, Depends(oauth2_scheme)]
+
+
+async def get_cached_user(username: Optional[str]) -> Optional[User]:
+    """
+    Get the user by their username, keeping found users in a short-lived cache.
+
+    Args:
+        username (Optional[str]): The username of the user.
+
+    Returns:
+        Optional[User]: The user or None if the user does not exist.
+    """
+    user = user_cache.get(username)
+    if user is None:
+        user = await run_in_threadpool(get_user_operations().get_user_by_username_from_db, username)
+        if user is not None:
+            user_cache[username] = user
+    return user
 
 
-async def get_current_active_user(token: str = oauth2_scheme_depends):
+async def get_current_active_user(token: Token):
     """
     Get the current active user by their token.
 
     Args:
-        token (str): The token of the user.
+        token (Token): The token of the user.
 
     Returns:
         User: The current active user.
@@ -72,23 +157,23 @@ async def get_current_active_user(token: str = oauth2_scheme_depends):
         detail='Could not validate credentials',
         headers={'WWW-Authenticate': 'Bearer'},
     )
-    username = await auth.get_username_by_token(token)
-    user = user_operations.get_user_by_username_from_db(username)
+    username = await get_auth().get_username_by_token(token)
+    user = await get_cached_user(username)
     if not user:
         raise credentials_exception
     return user
 
 
-get_current_active_user_depends = Depends(get_current_active_user)
+CurrentUser = Annotated[User, Depends(get_current_active_user)]
 
 
 @user_routes.get('/me')
-async def read_users_me(current_user: User = get_current_active_user_depends):
+async def read_users_me(current_user: CurrentUser):
     """
     Get the username of the current active user.
 
     Args:
-        current_user (User): The current active user.
+        current_user (CurrentUser): The current active user.
 
     Returns:
         str: The username of the current active user.
@@ -97,34 +182,28 @@ async def read_users_me(current_user: User = get_current_active_user_depends):
     return user.username
 
 
-get_current_active_user_depends = Depends(get_current_active_user)
-
-
 @user_routes.get('/me/assets')
-async def read_users_assets(current_user: User = get_current_active_user_depends):
+async def read_users_assets(current_user: CurrentUser):
     """
     Get the assets of the current active user.
 
     Args:
-        current_user (User): The current active user.
+        current_user (CurrentUser): The current active user.
 
     Returns:
         list: The assets of the current active user.
     """
-    return user_operations.get_user_assets_info(current_user)
-
-
-get_current_active_user_depends = Depends(get_current_active_user)
+    return await run_in_threadpool(get_user_operations().get_user_assets_info, current_user)
 
 
 @user_routes.post('/me/assets')
-async def create_user_asset(asset_form: AssetCreate, current_user: User = get_current_active_user_depends):
+async def create_user_asset(asset_form: AssetCreate, current_user: CurrentUser):
     """
     Create a new asset for the current active user.
 
     Args:
         asset_form (AssetCreate): The form data to create the asset.
-        current_user (User): The current active user.
+        current_user (CurrentUser): The current active user.
 
     Returns:
         dict: A message indicating the success of the operation.
@@ -132,15 +211,15 @@ async def create_user_asset(asset_form: AssetCreate, current_user: User = get_cu
     Raises:
         HTTPException: If the currency does not exist or if there is an error creating the asset.
     """
-    currency = currency_operations.get_currency_by_name_from_db(asset_form.currency)
+    currency = await run_in_threadpool(get_currency_operations().get_currency_by_name_from_db, asset_form.currency)
     if not currency:
         raise HTTPException(status_code=HTTP_STATUS_NOT_FOUND, detail='Currency not found')
     try:
-        asset = user_operations.create_user_asset(current_user, currency)
+        asset = await run_in_threadpool(get_user_operations().create_user_asset, current_user, currency)
     except Exception as create_error:
         raise HTTPException(status_code=HTTP_STATUS_BAD_REQUEST, detail=f'create_user_asset {str(create_error)}')
     try:
-        asset_operation.add_asset_amount(asset.id, asset_form.amount)
+        await run_in_threadpool(get_asset_operations().add_asset_amount, asset.id, asset_form.amount)
     except Exception as add_error:
         raise HTTPException(status_code=HTTP_STATUS_BAD_REQUEST, detail=f'add asset amount{str(add_error)}')
     return {'status': 'success'}
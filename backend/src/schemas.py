@@ -1,7 +1,12 @@
 """This module contains Pydantic models for User and Asset entities."""
 
+from typing import Annotated
+
+from fastapi import HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
+
+BEARER_PREFIX = 'bearer '
 
 
 class UserCreateOrLogin(BaseModel):
@@ -13,6 +18,8 @@ class UserCreateOrLogin(BaseModel):
         password (str): The password of the User.
     """
 
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
     username: str
     password: str
 
@@ -23,12 +30,40 @@ class AssetCreate(BaseModel):
 
     Attributes:
         currency (str): The currency of the Asset.
-        amount (float): The amount of the Asset.
+        amount (float): The amount of the Asset, not negative.
     """
 
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
     currency: str
-    amount: float
+    amount: Annotated[float, Field(ge=0)]
+
+
+class BearerToken(OAuth2PasswordBearer):
+    """OAuth2 bearer scheme that reads the token straight from the Authorization header."""
+
+    async def __call__(self, request: Request) -> str:
+        """
+        Get the bearer token of the request.
+
+        Args:
+            request (Request): The incoming request.
+
+        Returns:
+            str: The token without the Bearer prefix.
+
+        Raises:
+            HTTPException: If the request has no bearer token.
+        """
+        authorization = request.headers.get('authorization', '')
+        if authorization[:len(BEARER_PREFIX)].lower() != BEARER_PREFIX:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail='Not authenticated',
+                headers={'WWW-Authenticate': 'Bearer'},
+            )
+        return authorization[len(BEARER_PREFIX):]
 
 
 # OAuth2 scheme with the token URL set to "/token"
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl='/token')
+oauth2_scheme = BearerToken(tokenUrl='/token', scheme_name='OAuth2PasswordBearer')
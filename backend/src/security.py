@@ -0,0 +1,168 @@
+"""This module contains the Authentication class for handling user authentication."""
+
+import hmac
+import time
+from datetime import timedelta
+from functools import lru_cache
+from threading import Lock
+
+from cachetools import LRUCache, TTLCache
+from fastapi.concurrency import run_in_threadpool
+from jose import JWTError, jwk, jwt
+from passlib.context import CryptContext
+
+from src.config import get_settings
+from src.db import get_user_operations
+from src.models import User
+
+PASSWORD_CACHE_SIZE = 4096
+PASSWORD_CACHE_TTL_SECONDS = 60
+TOKEN_CACHE_SIZE = 10000
+
+
+class Authentication:
+    """A class used to handle user authentication."""
+
+    def __init__(self):
+        """
+        Initialize an instance of the Authentication class.
+
+        The instance is initialized with a CryptContext for password hashing and verification,
+        a signing key built once for the JWT tokens and short-lived caches
+        of password verification results and decoded tokens.
+        """
+        self.pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+        settings = get_settings()
+        self._jwt_algorithm = settings.ALGORITHM
+        self._jwt_algorithms = (settings.ALGORITHM,)
+        self._jwt_key = jwk.construct(settings.TOKEN_SECRET, settings.ALGORITHM)
+        self._verified_passwords = TTLCache(maxsize=PASSWORD_CACHE_SIZE, ttl=PASSWORD_CACHE_TTL_SECONDS)
+        self._verified_passwords_lock = Lock()
+        self._token_cache = LRUCache(maxsize=TOKEN_CACHE_SIZE)
+
+    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        """Compare plain password with hashed password.
+
+        The results are cached for a short time by an HMAC of both passwords,
+        so repeated logins do not run bcrypt again and no plain password is stored.
+
+        Args:
+            plain_password (str): Plain text password
+            hashed_password (str): Hashed password
+
+        Returns:
+            bool: True if plain_password hash matches with hashed_password else False
+        """
+        cache_key = hmac.new(
+            get_settings().TOKEN_SECRET.encode(),
+            b'\0'.join((plain_password.encode(), hashed_password.encode())),
+            'sha256',
+        ).digest()
+        with self._verified_passwords_lock:
+            is_verified = self._verified_passwords.get(cache_key)
+        if is_verified is None:
+            is_verified = self.pwd_context.verify(plain_password, hashed_password)
+            with self._verified_passwords_lock:
+                self._verified_passwords[cache_key] = is_verified
+        return is_verified
+
+    def get_password_hash(self, password: str) -> str:
+        """Get password hash.
+
+        Args:
+            password (str): Password or any string who need to hash
+
+        Returns:
+            str: Hashed password
+        """
+        return self.pwd_context.hash(password)
+
+    def generate_jwt_token(
+        self,
+        username: str,
+        encode_data: dict | None = None,
+        expires_timedelta: timedelta | None = None,
+    ) -> str:
+        """Generate JWT token.
+
+        Args:
+            username (str): Username of the user. Encoded in the token as 'sub'.
+            encode_data (Dict[str, Any], optional): Any data to encode in the token. Defaults to None.
+            expires_timedelta (timedelta, optional): Token lifetime. Defaults in config.
+
+        Returns:
+            str: JWT token.
+
+        Raises:
+            ValueError: If encode_data is not a dictionary.
+        """
+        if encode_data is None:
+            encode_data = {}
+        if not isinstance(encode_data, dict):
+            raise ValueError('encode_data must be a dictionary')
+
+        to_encode = encode_data.copy()
+        if not expires_timedelta:
+            expires_timedelta = timedelta(
+                minutes=get_settings().TOKEN_EXPIRE_MINUTES)
+        expire = int(time.time() + expires_timedelta.total_seconds())
+        to_encode.update({'exp': expire, 'sub': username})
+        return jwt.encode(to_encode, self._jwt_key, algorithm=self._jwt_algorithm)
+
+    async def authenticate_user(self, username: str, password: str) -> User:
+        """
+        Authenticate the user with the given username and password.
+
+        Args:
+            username (str): username of the user
+            password (str): password of the user
+
+        Raises:
+            Exception: if the username or password is incorrect or the user is not found
+
+        Returns:
+            User: object of the user
+        """
+        user: User = await run_in_threadpool(get_user_operations().get_user_by_username_from_db, username)
+        if not user:
+            raise Exception(f'User with username {username} not found')
+        if not await run_in_threadpool(self.verify_password, password, user.hash_password):
+            raise Exception('Incorrect password')
+        return user
+
+    async def get_username_by_token(self, token: str) -> str | None:
+        """
+        Get the username of the user by the JWT token.
+
+        Decoded tokens are cached until they expire, so repeated requests with the same token are not decoded again.
+
+        Args:
+            token (str): JWT token
+
+        Returns:
+            str | None: string of the username or None if the token is invalid or expired
+        """
+        cached = self._token_cache.get(token)
+        if cached is not None and time.time() < cached[1]:
+            return cached[0]
+        try:
+            payload = jwt.decode(token, self._jwt_key, algorithms=self._jwt_algorithms)
+        except JWTError:
+            return None
+
+        username = payload.get('sub', None)
+        expires_at = payload.get('exp')
+        if expires_at is not None:
+            self._token_cache[token] = (username, expires_at)
+        return username
+
+
+@lru_cache(maxsize=1)
+def get_auth() -> Authentication:
+    """
+    Get the authentication helper, building its signing key from the settings on the first call.
+
+    Returns:
+        Authentication: the authentication helper
+    """
+    return Authentication()
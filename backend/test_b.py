@@ -5,130 +5,177 @@ It includes tests for the /cryptocurrencies, /users/me, /users/me/assets, /token
 It also includes tests for the correct and incorrect credentials for the /token endpoint.
 """
 
-from datetime import timedelta
-from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from contextlib import ExitStack
+from dataclasses import dataclass
+from unittest.mock import MagicMock, patch
 
 import pytest
-from jose import jwt
-from starlette.testclient import TestClient
+from fastapi.routing import APIRoute
 
-from src.config import settings
+from src.config import get_settings
 from src.db import UserOperations
-from src.main import app
-from src.models import User
-from src.secutiry import Authentication
-
+from src.listings import get_listings_cache
+from src.models import Base, User
+from src.router import get_current_active_user, user_cache
+from src.security import Authentication
+from testdata import AUTHORIZATION_HEADERS, AsyncReturns, returns
 
 HTTP_STATUS_OK = 200
 HTTP_STATUS_CREATED = 201
+HTTP_STATUS_NOT_MODIFIED = 304
 HTTP_STATUS_BAD_REQUEST = 400
+HTTP_STATUS_UNAUTHORIZED = 401
 HTTP_STATUS_NOT_FOUND = 404
-TEST_PASSWORD = 'hashed_password'
+HTTP_STATUS_UNPROCESSABLE_ENTITY = 422
 
 
-@pytest.mark.asyncio
-async def test_get_cryptocurrencies():
+@pytest.fixture(autouse=True)
+def clear_user_cache():
     """
-    Test the /cryptocurrencies endpoint.
+    Fixture for emptying the user cache of the get_current_active_user dependency around every test.
 
-    This test checks if the endpoint returns the correct status code and response body.
+    Yields:
+        None: The user cache is empty while the test runs.
     """
-    mock_get_listings_from_db = Mock()
-    mock_get_listings_from_db.return_value = [
-        {'name': 'Bitcoin', 'symbol': 'BTC', 'price': 50000, 'sync_timestamp': '2022-01-01T00:00:00Z'},
-    ]
+    user_cache.clear()
+    yield
+    user_cache.clear()
 
-    with patch('src.db.DB.get_listings_from_db', new=mock_get_listings_from_db):
-        client = TestClient(app)
-        response = client.get('/cryptocurrencies')
-        assert response.status_code == HTTP_STATUS_OK
-        assert response.json() == [
-            {'name': 'Bitcoin', 'symbol': 'BTC', 'price': 50000, 'sync_timestamp': '2022-01-01T00:00:00Z'},
-        ]
 
+@pytest.fixture(scope='module')
+def listings():
+    """
+    Fixture for the listings returned by the mocked database.
 
-@pytest.mark.asyncio
-async def test_get_cryptocurrency():
+    Returns:
+        list[dict]: A list with one cryptocurrency.
     """
-    Test the /cryptocurrencies/{id} endpoint.
+    return [{'name': 'Bitcoin', 'symbol': 'BTC', 'price': 50000, 'sync_timestamp': '2022-01-01T00:00:00Z'}]
 
-    This test checks if the endpoint returns the correct status code and response body for a valid cryptocurrency ID.
+
+@pytest.fixture
+def listings_snapshot(listings):
     """
-    mock_get_listings_from_db = Mock()
-    mock_get_listings_from_db.return_value = [
-        {
-            'name': 'Bitcoin',
-            'symbol': 'BTC',
-            'price': 50000,
-            'sync_timestamp': '2022-01-01T00:00:00Z',
-        },
-    ]
-    with patch('src.db.DB.get_listings_from_db', new=mock_get_listings_from_db):
-        client = TestClient(app)
-        response = client.get('/cryptocurrencies/1')
-        assert response.status_code == HTTP_STATUS_OK
-        assert response.json() == {
-            'name': 'Bitcoin',
-            'symbol': 'BTC',
-            'price': 50000,
-            'sync_timestamp': '2022-01-01T00:00:00Z',
-        }
-
-
-@pytest.mark.asyncio
-async def test_get_cryptocurrency_not_found():
+    Fixture for loading the listings into the listings cache.
+
+    Args:
+        listings (list[dict]): The listings returned by the mocked database.
+    """
+    with patch('src.db.Database.get_listings_from_db', new=returns(listings)):
+        get_listings_cache().refresh()
+
+
+@pytest.mark.usefixtures('listings_snapshot')
+@pytest.mark.parametrize(('url', 'expected_status', 'expected_index'), [
+    ('/cryptocurrencies', HTTP_STATUS_OK, None),
+    ('/cryptocurrencies/1', HTTP_STATUS_OK, 0),
+    ('/cryptocurrencies/2', HTTP_STATUS_NOT_FOUND, None),
+])
+@pytest.mark.asyncio(loop_scope='session')
+async def test_get_cryptocurrencies(client, listings, url, expected_status, expected_index):
     """
-    Test the /cryptocurrencies/{id} endpoint.
+    Test the /cryptocurrencies and /cryptocurrencies/{id} endpoints.
 
-    This test checks if the endpoint returns the correct status code when a cryptocurrency ID is not found.
+    This test checks that the list, a cryptocurrency by its ID and an unknown ID get the right status and body.
+
+    Args:
+        client (AsyncClient): An AsyncClient instance bound to the application.
+        listings (list[dict]): The listings returned by the mocked database.
+        url (str): The requested URL.
+        expected_status (int): The expected status code.
+        expected_index (Optional[int]): Index of the expected listing, or None if the whole list is expected.
     """
-    mock_get_listings_from_db = Mock()
-    mock_get_listings_from_db.return_value = [
-        {
-            'name': 'Bitcoin',
-            'symbol': 'BTC',
-            'price': 50000,
-            'sync_timestamp': '2022-01-01T00:00:00Z',
-        },
-    ]
-    with patch('src.db.DB.get_listings_from_db', new=mock_get_listings_from_db):
-        client = TestClient(app)
-        response = client.get(f'/cryptocurrencies/{len(mock_get_listings_from_db.return_value)*2}')
-        assert response.status_code == HTTP_STATUS_NOT_FOUND
+    response = await client.get(url)
+    expected_body = listings if expected_index is None else listings[expected_index]
+
+    assert response.status_code == expected_status
+    if expected_status == HTTP_STATUS_OK:
+        assert response.json() == expected_body
+
+
+@pytest.mark.asyncio(loop_scope='session')
+async def test_get_cryptocurrencies_not_modified(client, listings):
+    """
+    Test the caching headers of the /cryptocurrencies endpoint.
 
+    This test checks that the ETag is sent, that a request with the same ETag, weak or in a list, gets 304
+    while the listings do not change and that it gets the listings again once they change.
 
-@pytest.mark.asyncio
-async def test_read_users_me():
+    Args:
+        client (AsyncClient): An AsyncClient instance bound to the application.
+        listings (list[dict]): The listings returned by the mocked database.
+    """
+    max_age = get_settings().DB_UPDATE_INTERVAL_MINUTES * 60
+    with patch('src.db.Database.get_listings_from_db', new=returns([])):
+        get_listings_cache().refresh()
+        first_response = await client.get('/cryptocurrencies')
+        etag = first_response.headers['ETag']
+        cached_response = await client.get('/cryptocurrencies', headers={'If-None-Match': f'W/{etag}'})
+        get_listings_cache().refresh()
+        unchanged_response = await client.get('/cryptocurrencies', headers={'If-None-Match': f'"other", {etag}'})
+    with patch('src.db.Database.get_listings_from_db', new=returns(listings)):
+        get_listings_cache().refresh()
+        changed_response = await client.get('/cryptocurrencies', headers={'If-None-Match': etag})
+
+    assert cached_response.status_code == HTTP_STATUS_NOT_MODIFIED
+    assert cached_response.headers['Cache-Control'] == f'public, max-age={max_age}'
+    assert unchanged_response.status_code == HTTP_STATUS_NOT_MODIFIED
+    assert changed_response.status_code == HTTP_STATUS_OK
+
+
+@pytest.mark.asyncio(loop_scope='session')
+async def test_read_users_me(client):
     """
     Test the /users/me endpoint.
 
     This test checks if the endpoint returns the correct status code and response body for a valid user.
+
+    Args:
+        client (AsyncClient): An AsyncClient instance bound to the application.
     """
-    mock_get_current_active_user = MagicMock()
-    mock_get_current_active_user.return_value = User(username='testuser')
+    with ExitStack() as stack:
+        stack.enter_context(
+            patch('src.security.Authentication.get_username_by_token', new=AsyncReturns('testuser')),
+        )
+        stack.enter_context(
+            patch('src.db.UserOperations.get_user_by_username_from_db', new=returns(User(username='testuser'))),
+        )
+        response = await client.get('/users/me', headers=AUTHORIZATION_HEADERS)
 
-    mock_get_username_by_token = AsyncMock()
-    mock_get_username_by_token.return_value = 'testuser'
+    assert response.status_code == HTTP_STATUS_OK
+    assert response.json() == 'testuser'
 
-    mock_get_user_by_username_from_db = MagicMock()
-    mock_get_user_by_username_from_db.return_value = User(username='testuser')
 
-    with patch('src.router.get_current_active_user', new=mock_get_current_active_user):
-        with patch('src.secutiry.Authentication.get_username_by_token', new=mock_get_username_by_token):
-            with patch('src.db.UserOperations.get_user_by_username_from_db', new=mock_get_user_by_username_from_db):
-                client = TestClient(app)
-                client.headers = {'Authorization': 'Bearer test_token'}
-                response = client.get('/users/me')
-                assert response.status_code == HTTP_STATUS_OK
-                assert response.json() == 'testuser'
+@pytest.mark.asyncio(loop_scope='session')
+async def test_current_user_is_cached(client):
+    """
+    Test the user cache of the get_current_active_user dependency.
 
+    This test checks that repeated requests of the same user query the database once.
 
-@pytest.mark.asyncio
-async def test_read_users_assets():
+    Args:
+        client (AsyncClient): An AsyncClient instance bound to the application.
+    """
+    mock_get_user_by_username_from_db = MagicMock(return_value=User(username='testuser'))
+
+    with patch('src.security.Authentication.get_username_by_token', new=AsyncReturns('testuser')):
+        with patch('src.db.UserOperations.get_user_by_username_from_db', new=mock_get_user_by_username_from_db):
+            responses = [await client.get('/users/me', headers=AUTHORIZATION_HEADERS) for _ in range(2)]
+
+    assert [response.json() for response in responses] == ['testuser', 'testuser']
+    mock_get_user_by_username_from_db.assert_called_once_with('testuser')
+
+
+@pytest.mark.asyncio(loop_scope='session')
+async def test_read_users_assets(app_instance, client):
     """
     Test the /users/me/assets endpoint.
 
     This test checks if the endpoint returns the correct status code and response body for a valid user.
+
+    Args:
+        app_instance (FastAPI): The application under test.
+        client (AsyncClient): An AsyncClient instance bound to the application.
     """
     test_assets = [
         {
@@ -147,149 +194,159 @@ async def test_read_users_assets():
 
     test_user = User(username='testuser')
 
-    with patch('src.router.get_current_active_user', return_value=test_user):
-        with patch('src.db.UserOperations.get_user_assets_info', return_value=test_assets):
-            with patch('sqlalchemy.orm.Session.query', return_value=MagicMock()):
-                with patch('sqlalchemy.orm.query.Query.filter_by', return_value=MagicMock()):
-                    with patch('sqlalchemy.orm.query.Query.all', return_value=[]):
-                        client = TestClient(app)
-                        client.headers = {'Authorization': 'Bearer test_token'}
-                        response = client.get('/users/me/assets')
+    with ExitStack() as stack:
+        stack.enter_context(patch.dict(app_instance.dependency_overrides, {get_current_active_user: lambda: test_user}))
+        stack.enter_context(patch('src.db.UserOperations.get_user_assets_info', new=returns(test_assets)))
+        response = await client.get('/users/me/assets', headers=AUTHORIZATION_HEADERS)
 
     assert response.status_code == HTTP_STATUS_OK
     assert response.json() == test_assets
 
 
-@pytest.fixture
-def client():
+@pytest.mark.asyncio(loop_scope='session')
+async def test_create_asset_rejects_negative_amount(app_instance, client):
     """
-    Fixture for creating a test client.
+    Test the validation of the POST /users/me/assets endpoint.
 
-    Returns:
-        TestClient: A TestClient instance with the application.
+    This test checks that a negative amount is rejected before the handler runs.
+
+    Args:
+        app_instance (FastAPI): The application under test.
+        client (AsyncClient): An AsyncClient instance bound to the application.
     """
-    return TestClient(app)
+    with patch.dict(app_instance.dependency_overrides, {get_current_active_user: lambda: User(username='testuser')}):
+        with patch('src.db.CurrencyOperation.get_currency_by_name_from_db') as mock_get_currency_by_name_from_db:
+            response = await client.post('/users/me/assets', json={'currency': 'Bitcoin', 'amount': -1})
+            mock_get_currency_by_name_from_db.assert_not_called()
 
+    assert response.status_code == HTTP_STATUS_UNPROCESSABLE_ENTITY
 
-@pytest.fixture
-def test_user():
-    """
-    Fixture for creating a test user.
 
-    Returns:
-        User: A User instance with a username and hashed password.
+@pytest.mark.asyncio(loop_scope='session')
+async def test_users_me_requires_bearer_token(client):
     """
-    return User(username='test', hash_password=TEST_PASSWORD)
-
-
-@patch.object(UserOperations, 'get_user_by_username_from_db')
-@patch('src.secutiry.Authentication.generate_jwt_token')
-@patch('src.secutiry.Authentication.verify_password')
-def test_login_correct_credentials(
-    mock_verify_password,
-    mock_generate_jwt_token,
-    mock_get_user_by_username_from_db,
-    client,
-    test_user,
-):
-    """
-    Test the /token endpoint with correct credentials.
+    Test the /users/me endpoint without a bearer token.
 
-    This test checks if the endpoint returns the correct status code and response body when the credentials are correct.
+    This test checks that requests without the Bearer scheme are rejected before the token is decoded.
 
     Args:
-        mock_verify_password (MagicMock): Mock for the verify_password function.
-        mock_generate_jwt_token (MagicMock): Mock for the generate_jwt_token function.
-        mock_get_user_by_username_from_db (MagicMock): Mock for the get_user_by_username_from_db function.
-        client (TestClient): A TestClient instance for testing.
-        test_user (User): A User instance for testing.
+        client (AsyncClient): An AsyncClient instance bound to the application.
     """
-    mock_get_user_by_username_from_db.return_value = test_user
-    mock_generate_jwt_token.return_value = 'dummy_token'
-    mock_verify_password.return_value = True
+    with patch('src.security.Authentication.get_username_by_token') as mock_get_username_by_token:
+        responses = [
+            await client.get('/users/me'),
+            await client.get('/users/me', headers={'Authorization': 'Basic test'}),
+        ]
+        mock_get_username_by_token.assert_not_called()
 
-    response = client.post('/token', json={'username': 'test', 'password': 'password'})
+    assert [response.status_code for response in responses] == [HTTP_STATUS_UNAUTHORIZED, HTTP_STATUS_UNAUTHORIZED]
+    assert responses[0].headers['WWW-Authenticate'] == 'Bearer'
 
-    assert response.status_code == HTTP_STATUS_OK
-    assert response.json() == {'token': 'dummy_token', 'token_type': 'bearer'}
+
+@dataclass
+class AuthMocks:
+    """Mocks of the user lookups and password and token helpers used by the /token and /register endpoints."""
+
+    get_user_by_username_from_db: MagicMock
+    create_user: MagicMock
+    verify_password: MagicMock
+    get_password_hash: MagicMock
+    generate_jwt_token: MagicMock
 
 
-@patch.object(UserOperations, 'get_user_by_username_from_db')
-def test_login_incorrect_credentials(
-    mock_get_user_by_username_from_db,
-    client,
-):
+@pytest.fixture
+def auth_mocks(monkeypatch):
+    """
+    Fixture for replacing the user lookups and password and token helpers with mocks.
+
+    Args:
+        monkeypatch (MonkeyPatch): The pytest monkeypatch fixture.
+
+    Returns:
+        AuthMocks: The mocks, restored after the test.
     """
-    Test the /token endpoint with incorrect credentials.
+    mocks = AuthMocks(
+        get_user_by_username_from_db=MagicMock(return_value=None),
+        create_user=MagicMock(),
+        verify_password=MagicMock(),
+        get_password_hash=MagicMock(),
+        generate_jwt_token=MagicMock(),
+    )
+    monkeypatch.setattr(UserOperations, 'get_user_by_username_from_db', mocks.get_user_by_username_from_db)
+    monkeypatch.setattr(UserOperations, 'create_user', mocks.create_user)
+    monkeypatch.setattr(Authentication, 'verify_password', mocks.verify_password)
+    monkeypatch.setattr(Authentication, 'get_password_hash', mocks.get_password_hash)
+    monkeypatch.setattr(Authentication, 'generate_jwt_token', mocks.generate_jwt_token)
+    return mocks
+
+
+@pytest.mark.parametrize(('user_exists', 'expected_response'), [
+    (True, (HTTP_STATUS_OK, {'token': 'dummy_token', 'token_type': 'bearer'})),
+    (False, (HTTP_STATUS_BAD_REQUEST, {'detail': 'User with username test not found'})),
+])
+@pytest.mark.asyncio(loop_scope='session')
+async def test_login(auth_mocks, client, test_user, user_exists, expected_response):
+    """
+    Test the /token endpoint.
 
-    This test checks if the endpoint returns the correct status code when the credentials are incorrect.
+    This test checks if the endpoint returns the correct status code and response body
+    for correct credentials and for an unknown user.
 
     Args:
-        mock_get_user_by_username_from_db (MagicMock): Mock for the get_user_by_username_from_db function.
-        client (TestClient): A TestClient instance for testing.
+        auth_mocks (AuthMocks): Mocks of the user lookups and password and token helpers.
+        client (AsyncClient): An AsyncClient instance bound to the application.
+        test_user (User): A User instance for testing.
+        user_exists (bool): Whether the user lookup finds the test user.
+        expected_response (tuple[int, dict]): The expected status code and response body.
     """
-    mock_get_user_by_username_from_db.return_value = None
+    auth_mocks.get_user_by_username_from_db.return_value = test_user if user_exists else None
+    auth_mocks.generate_jwt_token.return_value = 'dummy_token'
+    auth_mocks.verify_password.return_value = user_exists
 
-    response = client.post('/token', json={'username': 'test', 'password': 'wrong_password'})
+    response = await client.post('/token', json={'username': 'test', 'password': 'password'})
 
-    assert response.status_code == HTTP_STATUS_BAD_REQUEST
+    expected_status, expected_body = expected_response
+    assert response.status_code == expected_status
+    assert response.json() == expected_body
 
 
-@patch('src.db.UserOperations.get_user_by_username_from_db')
-@patch('src.secutiry.Authentication.get_password_hash')
-@patch('src.db.UserOperations.create_user')
-def test_register(
-    mock_create_user,
-    mock_get_password_hash,
-    mock_get_user_by_username_from_db,
-    client,
-):
+@pytest.mark.asyncio(loop_scope='session')
+async def test_register(auth_mocks, client):
     """
     Test the /register endpoint.
 
     This test checks if the endpoint returns the correct status code and response body when a new user is registered.
 
     Args:
-        mock_create_user (MagicMock): Mock for the create_user function.
-        mock_get_password_hash (MagicMock): Mock for the get_password_hash function.
-        mock_get_user_by_username_from_db (MagicMock): Mock for the get_user_by_username_from_db function.
-        client (TestClient): A TestClient instance for testing.
+        auth_mocks (AuthMocks): Mocks of the user lookups and password and token helpers.
+        client (AsyncClient): An AsyncClient instance bound to the application.
     """
     username = 'testuser'
     password = 'testpassword'
     hashed_password = 'hashedpassword'
     user = User(username=username, hash_password=hashed_password)
 
-    mock_get_user_by_username_from_db.return_value = None
-    mock_get_password_hash.return_value = hashed_password
-    mock_create_user.return_value = user
+    auth_mocks.get_password_hash.return_value = hashed_password
+    auth_mocks.create_user.return_value = user
 
-    response = client.post('/register', json={'username': username, 'password': password})
+    response = await client.post('/register', json={'username': username, 'password': password})
 
     assert response.status_code == HTTP_STATUS_CREATED
     assert response.content == b'User created'
 
 
-def test_generate_jwt_token():
+def test_app_registers_models_and_routes_once(app_instance):
     """
-    Test the generate_jwt_token method of the Authentication class.
+    Test the SQLAlchemy metadata and the routes of the application.
 
-    This test checks if the method returns a valid JWT token when given correct parameters.
-    It also checks if the method raises a ValueError when the encode_data parameter is not a dictionary.
-    """
-    auth = Authentication()
-
-    username = 'testuser'
-    encode_data = {'data': 'test'}
-    expires_timedelta = timedelta(minutes=60)
-
-    token = auth.generate_jwt_token(username, encode_data, expires_timedelta)
+    This test checks that every table and every route is registered exactly once.
 
-    decoded_token = jwt.decode(token, settings.TOKEN_SECRET, algorithms=[settings.ALGORITHM])
-
-    assert decoded_token['sub'] == username
-    assert decoded_token['data'] == 'test'
+    Args:
+        app_instance (FastAPI): The application under test.
+    """
+    routes = [
+        (route.path, tuple(sorted(route.methods))) for route in app_instance.routes if isinstance(route, APIRoute)
+    ]
 
-    encode_data = 'not a dictionary'
-    with pytest.raises(ValueError):
-        auth.generate_jwt_token(username, encode_data, expires_timedelta)
+    assert set(Base.metadata.tables) == {'user', 'asset', 'asset_price_history', 'currency', 'price_history'}
+    assert len(routes) == len(set(routes))
@@ -0,0 +1,389 @@
+"""This module contains tests for the database operations and the SQLAlchemy models."""
+
+from datetime import datetime
+from unittest.mock import patch
+from uuid import RFC_4122, uuid4
+
+import pytest
+from sqlalchemy import UniqueConstraint, event, select
+
+from src.config import get_settings
+from src.db import AssetOperation, CurrencyOperation, Database, UserOperations
+from src.models import (Asset, AssetAmountPriceHistory, Base, Currency,
+                        PriceHistory, User, uuid7)
+from testdata import (BITCOIN_PRICE, ETHEREUM_PRICE, TEST_PASSWORD,
+                      TEST_TIMESTAMP, AsyncReturns, make_listing)
+
+SQLITE_SYNCHRONOUS_NORMAL = 1
+NEXT_TEST_TIMESTAMP = '2024-01-01T00:05:00.000Z'
+FIRST_SYNC = datetime.fromisoformat('2024-01-01')
+SECOND_SYNC = datetime.fromisoformat('2024-01-02')
+OLD_BITCOIN_PRICE = 40000
+NEW_BITCOIN_PRICE = 51000
+
+
+@pytest.fixture
+def database():
+    """
+    Fixture for creating a Database bound to an in-memory SQLite database.
+
+    Returns:
+        Database: A Database instance with created tables.
+    """
+    with patch.object(get_settings(), 'DATABASE_URL', 'sqlite://'):
+        database = Database()
+    database.create_db()
+    return database
+
+
+@pytest.mark.asyncio
+async def test_update_prices_creates_missing_currencies(database):
+    """
+    Test the update_price_histories method of the Database class.
+
+    This test checks that only the currencies missing from the database are created
+    and that one PriceHistory row is inserted per listing.
+
+    Args:
+        database (Database): A Database instance for testing.
+    """
+    with database.get_session() as setup_session:
+        with setup_session.begin():
+            setup_session.add(Currency(name='Bitcoin', symbol='BTC'))
+    listings = [make_listing('Bitcoin', 'BTC', BITCOIN_PRICE), make_listing('Ethereum', 'ETH', ETHEREUM_PRICE)]
+
+    with patch('src.http_client.CMCHTTPClient.get_listings', new=AsyncReturns((TEST_TIMESTAMP, listings))):
+        await database.update_price_histories()
+
+    with database.get_session() as db_session:
+        currencies = db_session.scalars(select(Currency)).all()
+        histories = db_session.scalars(select(PriceHistory)).all()
+    assert sorted(currency.name for currency in currencies) == ['Bitcoin', 'Ethereum']
+    assert len(histories) == len(listings)
+    assert {history.currency_id for history in histories} == {currency.id for currency in currencies}
+
+
+@pytest.mark.asyncio
+async def test_update_price_histories_inserts_rows(database):
+    """
+    Test the update_price_histories method of the Database class.
+
+    This test checks that a PriceHistory row with the listing price and timestamp is inserted for every listing.
+
+    Args:
+        database (Database): A Database instance for testing.
+    """
+    listings = [make_listing('Bitcoin', 'BTC', BITCOIN_PRICE), make_listing('Ethereum', 'ETH', ETHEREUM_PRICE)]
+
+    with patch('src.http_client.CMCHTTPClient.get_listings', new=AsyncReturns((TEST_TIMESTAMP, listings))):
+        await database.update_price_histories()
+
+    with database.get_session() as db_session:
+        currency_ids = {currency.name: currency.id for currency in db_session.scalars(select(Currency))}
+        histories = db_session.scalars(select(PriceHistory)).all()
+    assert sorted((history.currency_id, history.price) for history in histories) == sorted([
+        (currency_ids['Bitcoin'], BITCOIN_PRICE),
+        (currency_ids['Ethereum'], ETHEREUM_PRICE),
+    ])
+    for history in histories:
+        assert history.timestamp.replace(tzinfo=None) == FIRST_SYNC
+
+
+def test_get_listings_returns_latest_price(database):
+    """
+    Test the get_listings_from_db method of the Database class.
+
+    This test checks that every currency is listed once with its latest price
+    and that currencies without price history are skipped.
+
+    Args:
+        database (Database): A Database instance for testing.
+    """
+    with database.get_session() as db_session:
+        with db_session.begin():
+            bitcoin = Currency(name='Bitcoin', symbol='BTC')
+            db_session.add_all([bitcoin, Currency(name='Ethereum', symbol='ETH')])
+            db_session.flush()
+            db_session.add_all([
+                PriceHistory(currency_id=bitcoin.id, price=OLD_BITCOIN_PRICE, timestamp=FIRST_SYNC),
+                PriceHistory(currency_id=bitcoin.id, price=BITCOIN_PRICE, timestamp=SECOND_SYNC),
+            ])
+
+    listings = database.get_listings_from_db()
+
+    assert len(listings) == 1
+    assert listings[0]['name'] == 'Bitcoin'
+    assert listings[0]['symbol'] == 'BTC'
+    assert listings[0]['price'] == BITCOIN_PRICE
+    assert listings[0]['sync_timestamp'].replace(tzinfo=None) == SECOND_SYNC
+
+
+def test_get_user_assets_info_uses_latest_amount(database):
+    """
+    Test the get_user_assets_info method of the UserOperations class.
+
+    This test checks that every asset of the user is described by its latest amount and price.
+
+    Args:
+        database (Database): A Database instance for testing.
+    """
+    with database.get_session() as db_session:
+        with db_session.begin():
+            user = User(username='testuser', hash_password=TEST_PASSWORD)
+            currency = Currency(name='Bitcoin', symbol='BTC')
+            db_session.add_all([user, currency])
+            db_session.flush()
+            asset = Asset(user_id=user.id, currency_id=currency.id)
+            db_session.add(asset)
+            db_session.flush()
+            db_session.add_all([
+                AssetAmountPriceHistory(asset_id=asset.id, amount=1, price=OLD_BITCOIN_PRICE, timestamp=FIRST_SYNC),
+                AssetAmountPriceHistory(asset_id=asset.id, amount=2, price=BITCOIN_PRICE, timestamp=SECOND_SYNC),
+            ])
+            db_session.flush()
+            db_session.expunge(user)
+
+    assert UserOperations(database).get_user_assets_info(user) == [
+        {'currency': 'Bitcoin', 'amount': 2, 'current cost': 2 * BITCOIN_PRICE, 'current_price': BITCOIN_PRICE},
+    ]
+
+
+def test_get_user_assets_info_query_count(database):
+    """
+    Test the number of queries of the get_user_assets_info method of the UserOperations class.
+
+    This test checks that the assets are described with two queries whatever their number is.
+
+    Args:
+        database (Database): A Database instance for testing.
+    """
+    with database.get_session() as db_session:
+        with db_session.begin():
+            user = User(username='testuser', hash_password=TEST_PASSWORD)
+            currencies = [Currency(name=name, symbol=name.upper()) for name in ('first', 'second', 'third')]
+            db_session.add_all([user, *currencies])
+            db_session.flush()
+            assets = [Asset(user_id=user.id, currency_id=currency.id) for currency in currencies]
+            db_session.add_all(assets)
+            db_session.flush()
+            db_session.add_all([
+                AssetAmountPriceHistory(asset_id=asset.id, amount=1, price=BITCOIN_PRICE, timestamp=FIRST_SYNC)
+                for asset in assets
+            ])
+            db_session.expunge(user)
+    statements = []
+    event.listen(database.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    assets_info = UserOperations(database).get_user_assets_info(user)
+
+    assert len(assets_info) == len(assets)
+    assert len(statements) == 2
+
+
+@pytest.fixture
+def asset_id(database):
+    """
+    Fixture for creating an asset whose currency has two prices.
+
+    Args:
+        database (Database): A Database instance for testing.
+
+    Returns:
+        UUID: ID of the created asset.
+    """
+    with database.get_session() as db_session:
+        with db_session.begin():
+            user = User(username='testuser', hash_password=TEST_PASSWORD)
+            currency = Currency(name='Bitcoin', symbol='BTC')
+            db_session.add_all([user, currency])
+            db_session.flush()
+            asset = Asset(user_id=user.id, currency_id=currency.id)
+            db_session.add_all([
+                asset,
+                PriceHistory(currency_id=currency.id, price=OLD_BITCOIN_PRICE, timestamp=FIRST_SYNC),
+                PriceHistory(currency_id=currency.id, price=BITCOIN_PRICE, timestamp=SECOND_SYNC),
+            ])
+            db_session.flush()
+            return asset.id
+
+
+def test_add_asset_amount_uses_latest_price(database, asset_id):
+    """
+    Test the add_asset_amount method of the AssetOperation class.
+
+    This test checks that the amount is stored with the latest price of the asset currency
+    and that an unknown asset is rejected.
+
+    Args:
+        database (Database): A Database instance for testing.
+        asset_id (UUID): ID of the asset for testing.
+    """
+    asset_amount = AssetOperation(database).add_asset_amount(asset_id, 2)
+
+    assert asset_amount.asset_id == asset_id
+    assert asset_amount.amount == 2
+    assert asset_amount.price == BITCOIN_PRICE
+    with pytest.raises(ValueError):
+        AssetOperation(database).add_asset_amount(uuid4(), 2)
+
+
+def test_add_asset_amounts_uses_latest_price(database, asset_id):
+    """
+    Test the add_asset_amounts method of the AssetOperation class.
+
+    This test checks that the amounts are stored with the latest price of the asset currencies.
+
+    Args:
+        database (Database): A Database instance for testing.
+        asset_id (UUID): ID of the asset for testing.
+    """
+    AssetOperation(database).add_asset_amounts([(asset_id, 3)])
+
+    with database.get_session() as db_session:
+        histories = db_session.scalars(select(AssetAmountPriceHistory)).all()
+    stored = [(history.asset_id, history.amount, history.price) for history in histories]
+    assert stored == [(asset_id, 3, BITCOIN_PRICE)]
+
+
+def test_get_user_and_currency_by_name(database):
+    """
+    Test the get_user_by_username_from_db and get_currency_by_name_from_db methods.
+
+    This test checks that the lookups return the matching objects and None for unknown names.
+
+    Args:
+        database (Database): A Database instance for testing.
+    """
+    with database.get_session() as db_session:
+        with db_session.begin():
+            db_session.add_all([
+                User(username='testuser', hash_password=TEST_PASSWORD),
+                Currency(name='Bitcoin', symbol='BTC'),
+            ])
+
+    assert UserOperations(database).get_user_by_username_from_db('testuser').username == 'testuser'
+    assert UserOperations(database).get_user_by_username_from_db('unknown') is None
+    assert CurrencyOperation(database).get_currency_by_name_from_db('Bitcoin').symbol == 'BTC'
+    assert CurrencyOperation(database).get_currency_by_name_from_db('Unknown') is None
+
+
+def test_create_user_asset(database):
+    """
+    Test the create_user_asset method of the UserOperations class.
+
+    This test checks that the asset is created once and returned again for the same user and currency.
+
+    Args:
+        database (Database): A Database instance for testing.
+    """
+    with database.get_session() as db_session:
+        with db_session.begin():
+            user = User(username='testuser', hash_password=TEST_PASSWORD)
+            currency = Currency(name='Bitcoin', symbol='BTC')
+            db_session.add_all([user, currency])
+
+    asset = UserOperations(database).create_user_asset(user, currency)
+
+    assert asset.user_id == user.id
+    assert asset.currency_id == currency.id
+    assert UserOperations(database).create_user_asset(user, currency).id == asset.id
+
+
+@pytest.mark.asyncio
+async def test_update_prices_skips_unchanged_prices(database):
+    """
+    Test the update_price_histories method of the Database class.
+
+    This test checks that a repeated sync only stores the prices that changed
+    and that rows repeating a stored currency and timestamp are skipped instead of failing the sync.
+
+    Args:
+        database (Database): A Database instance for testing.
+    """
+    syncs = [
+        (
+            TEST_TIMESTAMP,
+            [make_listing('Bitcoin', 'BTC', BITCOIN_PRICE), make_listing('Ethereum', 'ETH', ETHEREUM_PRICE)],
+        ),
+        (TEST_TIMESTAMP, [make_listing('Bitcoin', 'BTC', NEW_BITCOIN_PRICE), make_listing('Dogecoin', 'DOGE', 1)]),
+        (
+            NEXT_TEST_TIMESTAMP,
+            [make_listing('Bitcoin', 'BTC', NEW_BITCOIN_PRICE), make_listing('Ethereum', 'ETH', ETHEREUM_PRICE)],
+        ),
+    ]
+
+    for sync in syncs:
+        with patch('src.http_client.CMCHTTPClient.get_listings', new=AsyncReturns(sync)):
+            await database.update_price_histories()
+
+    with database.get_session() as db_session:
+        prices = db_session.scalars(select(PriceHistory.price)).all()
+    assert sorted(prices) == [1, ETHEREUM_PRICE, BITCOIN_PRICE, NEW_BITCOIN_PRICE]
+
+
+def test_get_last_asset_amount(database, asset_id):
+    """
+    Test the get_last_asset_amount method of the AssetOperation class.
+
+    This test checks that the most recently added amount of the asset is returned.
+
+    Args:
+        database (Database): A Database instance for testing.
+        asset_id (UUID): ID of the asset for testing.
+    """
+    asset_operation = AssetOperation(database)
+    asset_operation.add_asset_amounts([(asset_id, 1)])
+    asset_operation.add_asset_amounts([(asset_id, 2)])
+    with database.get_session() as db_session:
+        asset = db_session.get(Asset, asset_id)
+
+    assert asset_operation.get_last_asset_amount(asset).amount == 2
+
+
+def test_tables_have_no_duplicate_indexes():
+    """
+    Test the indexes of the SQLAlchemy models.
+
+    This test checks that no index or unique constraint of a table repeats the columns of another one.
+    """
+    for table in Base.metadata.tables.values():
+        keys = [tuple(index.columns.keys()) for index in table.indexes]
+        keys.extend(
+            tuple(constraint.columns.keys())
+            for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint)
+        )
+        assert len(keys) == len(set(keys)), table.name
+
+
+def test_uuid7_is_time_ordered():
+    """
+    Test the uuid7 function.
+
+    This test checks that the generated UUIDs have version 7, the RFC 9562 variant and grow over time.
+    """
+    with patch('src.models.time.time', side_effect=[1, 2]):
+        first_id = uuid7()
+        second_id = uuid7()
+
+    assert first_id.version == second_id.version == 7
+    assert first_id.variant == second_id.variant == RFC_4122
+    assert first_id < second_id
+
+
+def test_sqlite_database_uses_wal(tmp_path):
+    """
+    Test the SQLite connection settings of the Database class.
+
+    This test checks that file databases are opened in WAL mode with NORMAL synchronous writes.
+
+    Args:
+        tmp_path (Path): A temporary directory for the database file.
+    """
+    with patch.object(get_settings(), 'DATABASE_URL', f'sqlite:///{tmp_path / "test.db"}'):
+        database = Database()
+
+    with database.engine.connect() as connection:
+        assert connection.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+        assert connection.exec_driver_sql('PRAGMA synchronous').scalar() == SQLITE_SYNCHRONOUS_NORMAL
+    database.engine.dispose()
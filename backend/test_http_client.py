@@ -0,0 +1,127 @@
+"""This module contains tests for the CoinMarketCap HTTP client."""
+
+import asyncio
+from contextlib import nullcontext
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
+import orjson
+import pytest
+from aiohttp import TCPConnector
+
+from src.config import get_settings
+from src.http_client import CMCHTTPClient
+from testdata import (BITCOIN_CMC_ID, BITCOIN_PRICE, ETHEREUM_CMC_ID,
+                      ETHEREUM_PRICE, TEST_TIMESTAMP, make_listing)
+
+
+@pytest.mark.asyncio
+async def test_cmc_client_reuses_session():
+    """
+    Test the start and stop methods of the CMCHTTPClient class.
+
+    This test checks that starting a started client keeps its session, that the session uses the given connector
+    and that stopping closes it.
+    """
+    settings = get_settings()
+    connector = Mock()
+    cmc_client = CMCHTTPClient(base_url=settings.BASE_API_URL, api_key=settings.CMC_API_KEY, connector=connector)
+    with patch('src.http_client.ClientSession') as mock_client_session:
+        mock_client_session.return_value.close = AsyncMock()
+        await cmc_client.start()
+        await cmc_client.start()
+        await cmc_client.stop()
+        await cmc_client.stop()
+
+        mock_client_session.assert_called_once()
+        assert mock_client_session.call_args.kwargs['connector'] is connector
+        assert mock_client_session.call_args.kwargs['connector_owner'] is False
+        assert mock_client_session.call_args.kwargs['skip_auto_headers'] == ('User-Agent',)
+        mock_client_session.return_value.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_cmc_client_keeps_injected_connector_open():
+    """
+    Test the start and stop methods of the CMCHTTPClient class with a given connector.
+
+    This test checks that stopping the client leaves the connector of the caller open, so the client can be restarted.
+    """
+    settings = get_settings()
+    connector = TCPConnector()
+    cmc_client = CMCHTTPClient(base_url=settings.BASE_API_URL, api_key=settings.CMC_API_KEY, connector=connector)
+    await cmc_client.start()
+    await cmc_client.stop()
+    assert not connector.closed
+
+    await cmc_client.start()
+    await cmc_client.stop()
+    await connector.close()
+
+
+@pytest.mark.asyncio
+async def test_cmc_client_get_listings():
+    """
+    Test the get_listings method of the CMCHTTPClient class.
+
+    This test checks that the listings are returned together with the status timestamp of the response.
+    """
+    listings = [make_listing('Bitcoin', 'BTC', BITCOIN_PRICE)]
+    response = MagicMock()
+    response.read = AsyncMock(return_value=orjson.dumps({'status': {'timestamp': TEST_TIMESTAMP}, 'data': listings}))
+    settings = get_settings()
+    cmc_client = CMCHTTPClient(base_url=settings.BASE_API_URL, api_key=settings.CMC_API_KEY)
+    with patch('src.http_client.ClientSession') as mock_client_session:
+        mock_client_session.return_value.get.return_value = nullcontext(response)
+        assert await cmc_client.get_listings() == (TEST_TIMESTAMP, listings)
+        mock_client_session.return_value.get.assert_called_once_with('/v1/cryptocurrency/listings/latest')
+
+
+@pytest.mark.asyncio
+async def test_cmc_client_get_currencies():
+    """
+    Test the get_currencies method of the CMCHTTPClient class.
+
+    This test checks that the quotes of several currencies are requested at once and keyed by integer id.
+    """
+    bitcoin = make_listing('Bitcoin', 'BTC', BITCOIN_PRICE)
+    ethereum = make_listing('Ethereum', 'ETH', ETHEREUM_PRICE)
+    response = MagicMock()
+    response.read = AsyncMock(
+        return_value=orjson.dumps({'data': {str(BITCOIN_CMC_ID): bitcoin, str(ETHEREUM_CMC_ID): ethereum}}),
+    )
+    settings = get_settings()
+    cmc_client = CMCHTTPClient(base_url=settings.BASE_API_URL, api_key=settings.CMC_API_KEY)
+    with patch('src.http_client.ClientSession') as mock_client_session:
+        mock_client_session.return_value.get.return_value = nullcontext(response)
+        currencies = await cmc_client.get_currencies([BITCOIN_CMC_ID, ETHEREUM_CMC_ID])
+        assert currencies == {BITCOIN_CMC_ID: bitcoin, ETHEREUM_CMC_ID: ethereum}
+        assert not await cmc_client.get_currencies([])
+        mock_client_session.return_value.get.assert_called_once_with(
+            '/v2/cryptocurrency/quotes/latest', params={'id': f'{BITCOIN_CMC_ID},{ETHEREUM_CMC_ID}'},
+        )
+
+
+@pytest.mark.asyncio
+async def test_cmc_client_caches_listings():
+    """
+    Test the response cache of the get_listings method of the CMCHTTPClient class.
+
+    This test checks that concurrent and repeated calls share one request and that a failed request is not reused.
+    """
+    listings = [make_listing('Bitcoin', 'BTC', BITCOIN_PRICE)]
+    response = MagicMock()
+    response.read = AsyncMock(side_effect=[
+        b'not json',
+        orjson.dumps({'status': {'timestamp': TEST_TIMESTAMP}, 'data': listings}),
+    ])
+    settings = get_settings()
+    cmc_client = CMCHTTPClient(base_url=settings.BASE_API_URL, api_key=settings.CMC_API_KEY)
+    with patch('src.http_client.ClientSession') as mock_client_session:
+        mock_client_session.return_value.get.return_value = nullcontext(response)
+        with pytest.raises(Exception):
+            await cmc_client.get_listings()
+        fetched = await asyncio.gather(cmc_client.get_listings(), cmc_client.get_listings())
+        fetched.append(await cmc_client.get_listings())
+        expected = (TEST_TIMESTAMP, listings)
+        assert fetched == [expected, expected, expected]
+        assert mock_client_session.return_value.get.call_count == 2
@@ -0,0 +1,124 @@
+"""This module contains tests for the Authentication class."""
+
+import base64
+from datetime import timedelta
+from unittest.mock import patch
+
+import orjson
+import pytest
+from jose import jwt
+
+from src.config import get_settings
+from src.models import User
+from src.security import Authentication, get_auth
+from testdata import returns
+
+
+def test_generate_jwt_token():
+    """
+    Test the generate_jwt_token method of the Authentication class.
+
+    This test checks the claims of the token by decoding its payload directly, without verifying the signature.
+    It also checks if the method raises a ValueError when the encode_data parameter is not a dictionary.
+    """
+    auth = Authentication()
+
+    username = 'testuser'
+    encode_data = {'data': 'test'}
+    expires_timedelta = timedelta(minutes=60)
+
+    token = auth.generate_jwt_token(username, encode_data, expires_timedelta)
+
+    _, payload_b64, _ = token.split('.')
+    payload = orjson.loads(base64.urlsafe_b64decode(f'{payload_b64}=='))
+
+    assert payload['sub'] == username
+    assert payload['data'] == 'test'
+    assert isinstance(payload['exp'], int)
+
+    encode_data = 'not a dictionary'
+    with pytest.raises(ValueError):
+        auth.generate_jwt_token(username, encode_data, expires_timedelta)
+
+
+def test_generate_jwt_token_signature():
+    """
+    Test the signature of the tokens returned by the generate_jwt_token method of the Authentication class.
+
+    This test checks that the token is signed with the configured secret and algorithm.
+    """
+    token = Authentication().generate_jwt_token('testuser')
+
+    settings = get_settings()
+    assert jwt.decode(token, settings.TOKEN_SECRET, algorithms=[settings.ALGORITHM])['sub'] == 'testuser'
+
+
+def test_get_auth_reads_settings_on_first_call():
+    """
+    Test the get_auth function.
+
+    This test checks that the settings are read when the authentication helper is first requested
+    and that the helper is built once.
+    """
+    get_auth.cache_clear()
+    with patch('src.security.get_settings', wraps=get_settings) as mock_get_settings:
+        auth = get_auth()
+        assert mock_get_settings.called
+
+    assert get_auth() is auth
+
+
+def test_verify_password_caches_result(hashed_password):
+    """
+    Test the verify_password method of the Authentication class.
+
+    This test checks that the result is correct and that bcrypt runs only once for repeated checks.
+
+    Args:
+        hashed_password (str): A bcrypt hash of 'password'.
+    """
+    auth = Authentication()
+
+    with patch.object(auth.pwd_context, 'verify', wraps=auth.pwd_context.verify) as mock_verify:
+        assert auth.verify_password('password', hashed_password)
+        assert auth.verify_password('password', hashed_password)
+        assert not auth.verify_password('wrong_password', hashed_password)
+        assert mock_verify.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_authenticate_user(hashed_password):
+    """
+    Test the authenticate_user method of the Authentication class.
+
+    This test checks that the user is returned for the right password and that a wrong password is rejected.
+
+    Args:
+        hashed_password (str): A bcrypt hash of 'password'.
+    """
+    auth = Authentication()
+    user = User(username='testuser', hash_password=hashed_password)
+
+    with patch('src.db.UserOperations.get_user_by_username_from_db', new=returns(user)):
+        assert await auth.authenticate_user('testuser', 'password') is user
+        with pytest.raises(Exception, match='Incorrect password'):
+            await auth.authenticate_user('testuser', 'wrong_password')
+
+
+@pytest.mark.asyncio
+async def test_get_username_by_token_caches_payload():
+    """
+    Test the get_username_by_token method of the Authentication class.
+
+    This test checks that a valid token is decoded once and that invalid and expired tokens give None.
+    """
+    auth = Authentication()
+    token = auth.generate_jwt_token('testuser', expires_timedelta=timedelta(minutes=1))
+    expired_token = auth.generate_jwt_token('testuser', expires_timedelta=timedelta(minutes=-1))
+
+    with patch('src.security.jwt.decode', wraps=jwt.decode) as mock_decode:
+        assert await auth.get_username_by_token(token) == 'testuser'
+        assert await auth.get_username_by_token(token) == 'testuser'
+        assert mock_decode.call_count == 1
+    assert await auth.get_username_by_token(expired_token) is None
+    assert await auth.get_username_by_token('invalid') is None
@@ -0,0 +1,65 @@
+"""This module contains the test data and stubs shared by the test modules."""
+
+from types import MappingProxyType
+
+TEST_PASSWORD = 'hashed_password'
+AUTHORIZATION_HEADERS = MappingProxyType({'Authorization': 'Bearer test_token'})
+TEST_TIMESTAMP = '2024-01-01T00:00:00.000Z'
+BITCOIN_PRICE = 50000
+ETHEREUM_PRICE = 2000
+BITCOIN_CMC_ID = 1
+ETHEREUM_CMC_ID = 1027
+
+
+def make_listing(name: str, symbol: str, price: float) -> dict:
+    """
+    Build a listing row in the format returned by CMCHTTPClient.get_listings.
+
+    Args:
+        name (str): name of the currency
+        symbol (str): symbol of the currency
+        price (float): price of the currency in USD
+
+    Returns:
+        dict: listing row
+    """
+    return {'name': name, 'symbol': symbol, 'quote': {'USD': {'price': price}}}
+
+
+def returns(return_value):
+    """
+    Build a plain stub function which ignores its arguments and returns the given value.
+
+    Args:
+        return_value: value returned by the stub
+
+    Returns:
+        Callable: stub function
+    """
+    return lambda *args, **kwargs: return_value
+
+
+class AsyncReturns:
+    """Stub coroutine function which ignores its arguments and returns the given value."""
+
+    def __init__(self, return_value):
+        """
+        Initialize the stub.
+
+        Args:
+            return_value: value returned by the stub
+        """
+        self._return_value = return_value
+
+    async def __call__(self, *args, **kwargs):
+        """
+        Return the stored value.
+
+        Args:
+            args: ignored positional arguments
+            kwargs: ignored keyword arguments
+
+        Returns:
+            Any: the value given to the stub
+        """
+        return self._return_value